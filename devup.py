@@ -1,40 +1,269 @@
 #!/usr/bin/env python3
+import concurrent.futures
+import functools
 import os
+import re
+import shlex
 import subprocess
 import sys
 import shutil
+import tempfile
+from dataclasses import dataclass
 import click
-import requests
-from dotenv import load_dotenv
+
+# requests, dotenv and pymysql are imported inside the functions that use
+# them so short commands like `clean` or `--help` start quickly
 
 ROOT = os.path.dirname(__file__)
 ENV_FILE = os.path.join(ROOT, ".env")
 ENV_EXAMPLE = os.path.join(ROOT, ".env.example")
+TEMPLATES_DIR = os.path.join(ROOT, "templates")
 DOCKER_COMPOSE = os.environ.get("DOCKER_COMPOSE", "docker-compose")
+_VERBOSE = False  # set by the top-level --verbose / DEVUP_VERBOSE
+
+# Set once ensure_env has populated os.environ in this process. Kept out
+# of os.environ so child processes (and nested devup runs) re-read .env
+_ENV_LOADED = False
+
+# Reused across MySQL probes when PyMySQL is available
+_MYSQL_CONN = None
+
+# Docker SDK client, when the `docker` package is installed
+_DOCKER = None
+
+# One keep-alive pool shared by every HTTP probe, built on first use
+SESSION = None
+
+
+def _http():
+    global SESSION
+    if SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        SESSION = requests.Session()
+        SESSION.mount("http://", HTTPAdapter(pool_connections=4,
+                                             pool_maxsize=4, max_retries=0))
+    return SESSION
 
 
 def run(cmd, check=True):
-    proc = subprocess.run(cmd, text=True,
-                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    click.echo(proc.stdout)
+    if _VERBOSE:
+        click.echo("$ " + shlex.join(cmd))
+    # Stream output line by line so long commands give immediate feedback
+    # without buffering everything in memory
+    proc = subprocess.Popen(cmd, text=True, bufsize=1,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    with proc.stdout:
+        for line in proc.stdout:
+            click.echo(line, nl=False)
+    proc.wait()
     if check and proc.returncode != 0:
         raise click.ClickException(f"Command {' '.join(cmd)} failed")
     return proc
 
 
+@functools.lru_cache(maxsize=4)
+def _parsed_env(path, mtime):
+    # Keyed on mtime so a stale parse is never returned for an edited .env
+    from dotenv import dotenv_values
+    return dotenv_values(path)
+
+
 def ensure_env():
-    if not os.path.exists(ENV_FILE):
+    global _ENV_LOADED
+    # Already loaded in this process, or the caller's environment (direnv,
+    # CI) says it is fully populated via DEVUP_ENV_LOADED
+    if _ENV_LOADED or os.environ.get("DEVUP_ENV_LOADED"):
+        return
+    try:
+        mtime = os.path.getmtime(ENV_FILE)
+    except OSError:
         raise click.ClickException(
             ".env not found. Run `./devup.py init` first.")
-    load_dotenv(ENV_FILE)
+    vals = _parsed_env(ENV_FILE, mtime)
+    os.environ.update({k: v for k, v in vals.items()
+                       if v is not None and k not in os.environ})
+    _ENV_LOADED = True
+
+
+@dataclass(frozen=True)
+class EnvCfg:
+    """Env-derived settings, resolved once per process."""
+    api_health: str
+    api_echo: str
+    db_host: str
+    db_port: int
+    db_user: str
+    db_password: str
+    mysql_cmd: tuple
+
+
+_cfg = None
+
+
+def _cfg_get():
+    global _cfg
+    if _cfg is None:
+        ensure_env()
+        api_port = os.environ.get("MOCK_API_PORT", "6000")
+        db_host = os.environ.get("DB_HOST", "localhost")
+        db_user = os.environ.get("DB_USER", "root")
+        db_password = os.environ.get("DB_PASSWORD", "")
+        _cfg = EnvCfg(
+            api_health=f"http://localhost:{api_port}/health",
+            api_echo=f"http://localhost:{api_port}/echo",
+            db_host=db_host,
+            db_port=int(os.environ.get("MYSQL_PORT", "3306")),
+            db_user=db_user,
+            db_password=db_password,
+            # Pass password safely via -p flag
+            mysql_cmd=(
+                DOCKER_COMPOSE, "exec", "-T", "mysql",
+                "mysqladmin", "ping",
+                "-h", db_host,
+                "-u", db_user,
+                f"-p{db_password}",
+            ),
+        )
+    return _cfg
+
+
+def _dc():
+    """Return a Docker SDK client; raises ImportError without the SDK."""
+    global _DOCKER
+    if _DOCKER is None:
+        import docker
+        _DOCKER = docker.from_env()
+    return _DOCKER
+
+
+def _sdk_docker_version():
+    """Ask the daemon over its socket; None if the SDK can't be used."""
+    try:
+        import docker
+    except ImportError:
+        return None
+    try:
+        return _dc().version()["Version"]
+    except docker.errors.DockerException:
+        return None
+
+
+def _sdk_compose_ps():
+    """Print compose containers via the SDK; False to fall back to CLI."""
+    try:
+        import docker
+    except ImportError:
+        return False
+    project = os.environ.get("COMPOSE_PROJECT_NAME") or re.sub(
+        r"[^a-z0-9_-]", "", os.path.basename(os.path.abspath(ROOT)).lower())
+    try:
+        containers = _dc().containers.list(
+            all=True,
+            filters={"label": f"com.docker.compose.project={project}"})
+    except docker.errors.DockerException:
+        return False
+    if not containers:
+        # Project started under another name (-p, compose `name:`), so
+        # let docker-compose ps resolve it
+        return False
+    for ct in containers:
+        health = ct.attrs.get("State", {}).get("Health", {}).get("Status")
+        click.echo(f"{ct.name:<24} {ct.status}"
+                   + (f" ({health})" if health else ""))
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _template(name):
+    with open(os.path.join(TEMPLATES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def _write_bytes(path, data):
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+# ---------------- Probes ----------------
+# Each probe returns the text to print so status/test can run them
+# concurrently and still emit output in a stable order.
+
+
+def _probe_api_health(c):
+    import requests
+    try:
+        r = _http().get(c.api_health, timeout=3)
+        if r.ok:
+            return click.style("✅ mock_api healthy", fg="green")
+        return click.style("⚠ mock_api unhealthy", fg="yellow")
+    except requests.RequestException:
+        return click.style("❌ mock_api unreachable", fg="red")
+
+
+def _probe_api_echo(c):
+    import requests
+    payload = {"msg": "smoke-test"}
+    try:
+        r = _http().post(c.api_echo, json=payload, timeout=3)
+        if r.ok and r.json().get("you_sent", {}).get("msg") == "smoke-test":
+            return click.style("✅ mock_api echo passed", fg="green")
+        return click.style("⚠ mock_api echo failed", fg="yellow")
+    except requests.RequestException:
+        return click.style("❌ mock_api unreachable", fg="red")
+
+
+def _probe_mysql(c):
+    try:
+        import pymysql  # noqa: F401
+    except ImportError:  # fall back to docker-compose exec mysqladmin
+        return _probe_mysql_exec(c)
+    return _probe_mysql_direct(c)
+
+
+def _probe_mysql_direct(c):
+    import pymysql
+    global _MYSQL_CONN
+    try:
+        if _MYSQL_CONN is None:
+            _MYSQL_CONN = pymysql.connect(
+                host=c.db_host,
+                port=c.db_port,
+                user=c.db_user,
+                password=c.db_password,
+                connect_timeout=2)
+        _MYSQL_CONN.ping(reconnect=False)
+        return "mysqld is alive"
+    except pymysql.MySQLError as e:
+        _MYSQL_CONN = None
+        return click.style(f"❌ mysql unreachable: {e}", fg="red")
+    except RuntimeError:
+        # caching_sha2_password full auth without `cryptography` installed
+        _MYSQL_CONN = None
+        return _probe_mysql_exec(c)
+
+
+def _probe_mysql_exec(c):
+    # subprocess.run releases the GIL while waiting, so the HTTP probe
+    # proceeds in parallel
+    proc = subprocess.run(c.mysql_cmd, text=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    return "Attempting mysql ping via docker-compose exec\n" + proc.stdout
 
 # ---------------- CLI ----------------
 
 
 @click.group()
-def cli():
+@click.option("-v", "--verbose", is_flag=True, envvar="DEVUP_VERBOSE",
+              help="Echo docker commands and show container listings.")
+def cli(verbose):
     """DevUp — automate local onboarding environment."""
-    pass
+    global _VERBOSE
+    _VERBOSE = verbose
 
 
 @cli.command()
@@ -46,7 +275,16 @@ def init():
         if not click.confirm(".env exists. Overwrite?"):
             click.echo("Aborted.")
             return
-    shutil.copy(ENV_EXAMPLE, ENV_FILE)
+    # Copy to a temp file and rename so a crash never leaves a partial .env
+    fd, tmp = tempfile.mkstemp(prefix=".env.", dir=ROOT or ".")
+    os.close(fd)
+    try:
+        shutil.copy(ENV_EXAMPLE, tmp)
+        os.replace(tmp, ENV_FILE)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
     click.echo(click.style("✅ Created .env from template", fg="green"))
 
 
@@ -64,69 +302,29 @@ def up(detach):
 @cli.command()
 def status():
     """Show container status and health."""
-    ensure_env()
-    run([DOCKER_COMPOSE, "ps"], check=False)
+    c = _cfg_get()
+    if _VERBOSE and not _sdk_compose_ps():
+        run([DOCKER_COMPOSE, "ps"], check=False)
 
-    # --- Mock API status ---
-    api_port = os.getenv("MOCK_API_PORT", "6000")
-    try:
-        r = requests.get(f"http://localhost:{api_port}/health", timeout=3)
-        if r.ok:
-            click.echo(click.style("✅ mock_api healthy", fg="green"))
-        else:
-            click.echo(click.style("⚠ mock_api unhealthy", fg="yellow"))
-    except requests.RequestException:
-        click.echo(click.style("❌ mock_api unreachable", fg="red"))
-
-    # --- MySQL status ---
-    click.echo("Attempting mysql ping via docker-compose exec")
-    db_user = os.environ.get("DB_USER", "root")
-    db_password = os.environ.get("DB_PASSWORD", "")
-    db_host = os.environ.get("DB_HOST", "localhost")
-
-    mysql_cmd = [
-        DOCKER_COMPOSE, "exec", "-T", "mysql",
-        "mysqladmin", "ping",
-        "-h", db_host,
-        "-u", db_user,
-        f"-p{db_password}"
-    ]
-    run(mysql_cmd, check=False)
+    # --- Mock API + MySQL status, probed concurrently ---
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as ex:
+        fa = ex.submit(_probe_api_health, c)
+        fm = ex.submit(_probe_mysql, c)
+        click.echo(fa.result())
+        click.echo(fm.result())
 
 
 @cli.command()
 def test():
     """Run smoke test on mock_api and MySQL."""
-    ensure_env()
-
-    # --- Mock API smoke test ---
-    api_port = os.getenv("MOCK_API_PORT", "6000")
-    payload = {"msg": "smoke-test"}
-    try:
-        r = requests.post(
-            f"http://localhost:{api_port}/echo", json=payload, timeout=3)
-        if r.ok and r.json().get("you_sent", {}).get("msg") == "smoke-test":
-            click.echo(click.style("✅ mock_api echo passed", fg="green"))
-        else:
-            click.echo(click.style("⚠ mock_api echo failed", fg="yellow"))
-    except requests.RequestException:
-        click.echo(click.style("❌ mock_api unreachable", fg="red"))
-
-    # --- MySQL ping test ---
-    click.echo("Attempting mysql ping via docker-compose exec")
-    db_user = os.environ.get("DB_USER", "root")
-    db_password = os.environ.get("DB_PASSWORD", "")
-    db_host = os.environ.get("DB_HOST", "localhost")
+    c = _cfg_get()
 
-    # Pass password safely via -p flag
-    mysql_cmd = [
-        DOCKER_COMPOSE, "exec", "-T", "mysql",
-        "mysqladmin", "ping",
-        "-h", db_host,
-        "-u", db_user,
-        f"-p{db_password}",
-    ]
-    run(mysql_cmd, check=False)
+    # --- Mock API echo + MySQL ping, probed concurrently ---
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as ex:
+        fa = ex.submit(_probe_api_echo, c)
+        fm = ex.submit(_probe_mysql, c)
+        click.echo(fa.result())
+        click.echo(fm.result())
 
 
 @cli.command()
@@ -134,7 +332,10 @@ def doctor():
     """Run host pre-flight checks."""
     issues = []
     # Docker
-    if shutil.which("docker") is None:
+    version = _sdk_docker_version()
+    if version is not None:
+        click.echo(f"🐳 Docker version {version}")
+    elif shutil.which("docker") is None:
         issues.append("Docker not found in PATH")
     else:
         try:
@@ -182,12 +383,16 @@ def clean():
 def add_mock(name):
     """Scaffold a new mock service."""
     mdir = os.path.join(ROOT, name)
-    os.makedirs(mdir, exist_ok=True)
-    with open(os.path.join(mdir, "app.py"), "w") as f:
-        f.write(
-            "from flask import Flask,jsonify\napp=Flask(__name__)\n@app.route('/health')\ndef h():return jsonify({'status':'ok'})\napp.run(host='0.0.0.0',port=5000)")
-    with open(os.path.join(mdir, "requirements.txt"), "w") as f:
-        f.write("Flask\n")
+    parent = os.path.dirname(mdir)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    try:
+        os.mkdir(mdir)
+    except FileExistsError:
+        click.echo(click.style(f"⚠ {mdir} already exists", fg="yellow"))
+        return
+    for fname in ("app.py", "requirements.txt"):
+        _write_bytes(os.path.join(mdir, fname), _template(fname + ".tmpl"))
     click.echo(click.style(f"✨ Mock service scaffolded at {mdir}", fg="green"))
 
 
@@ -1,6 +1,33 @@
-from flask import Flask, jsonify, request
+import os
+
+import orjson
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import JSONProvider
+
+
+class OrjsonProvider(JSONProvider):
+    """Route Flask's JSON handling through orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# /health is polled constantly, so its response is a prebuilt constant
+_HEALTH_BYTES = b'{"status":"ok"}'
+_HEALTH_HEADERS = [("Content-Type", "application/json"),
+                   ("Content-Length", str(len(_HEALTH_BYTES)))]
+
+
+@app.before_request
+def _fast_health():
+    if request.path == "/health" and request.method == "GET":
+        return Response(_HEALTH_BYTES, headers=_HEALTH_HEADERS)
 
 
 @app.route("/health", methods=["GET"])
@@ -10,9 +37,16 @@ def health():
 
 @app.route("/echo", methods=["POST"])
 def echo():
-    data = request.get_json(force=True, silent=True) or {}
-    return jsonify({"you_sent": data}), 200
+    try:
+        data = orjson.loads(request.get_data()) or {}
+    except orjson.JSONDecodeError:
+        data = {}
+    return app.response_class(orjson.dumps({"you_sent": data}),
+                              mimetype="application/json")
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Dev server only; the container runs gunicorn (see Dockerfile)
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "5000")),
+            debug=os.environ.get("FLASK_DEBUG") == "1",
+            use_reloader=False, threaded=True)